@@ -1,47 +1,224 @@
-import json
 import os
-import uuid
 import time
-import re
+import queue
+import string
 import logging
+import threading
+from concurrent.futures import Future
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 
 import boto3
+import orjson
+from botocore.config import Config
 from botocore.exceptions import ClientError, BotoCoreError
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+from flask.json.provider import DefaultJSONProvider
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Emit log records from a background thread so the request path only pays an
+# in-process enqueue instead of a synchronous write to the stream
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(
+    _log_queue, logging.StreamHandler(), respect_handler_level=True
+)
+_log_listener.start()
+logger.addHandler(QueueHandler(_log_queue))
+logger.propagate = False
+
+# Route every jsonify call through orjson's C encoder
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # Configuring environment variables
 SQS_QUEUE_URL = os.getenv("SQS_QUEUE_URL")
 AWS_REGION = os.getenv("AWS_REGION")
 
-# Initialize SQS client with retry config
+# Shared client config: a pool large enough for concurrent request threads
+# (the default of 10 serializes anything above that) and keepalive so warm
+# TLS connections survive between requests
+_BOTO_CONFIG = Config(
+    retries={
+        "max_attempts": 3,
+        "mode": "adaptive",
+    },
+    max_pool_connections=50,
+    tcp_keepalive=True,
+)
+
+# One module-level session shared across threads; clients derived from it
+# reuse the pooled HTTPS connections instead of re-handshaking
+_boto_session = boto3.session.Session()
+
 sqs_client = None
 if SQS_QUEUE_URL:
-    sqs_client = boto3.client(
+    sqs_client = _boto_session.client(
         "sqs",
         region_name=AWS_REGION,
-        config=boto3.session.Config(
-            retries = {
-                "max_attempts": 3,
-                "mode": "adaptive",
-            }
-        )
+        config=_BOTO_CONFIG
     )
 
+# Reject bodies SQS would refuse anyway (256 KB max message size) before
+# spending any parse/regex/queue time on them
+MAX_BODY_BYTES = 256 * 1024
+
+# SQS batching limits: 10 entries / 256 KB per send_message_batch call
+SQS_BATCH_MAX_ENTRIES = 10
+SQS_BATCH_MAX_BYTES = 256 * 1024
+SQS_BATCH_WINDOW_SECONDS = 0.02
+
+class _SqsBatcher:
+    """
+    Coalesces individual sends into send_message_batch calls.
+
+    Request threads enqueue (entry, future) pairs; a background thread
+    drains up to 10 entries (or whatever arrives within a 20 ms window)
+    and flushes them in a single SQS request, then resolves each future
+    with that entry's (message_id, error) outcome. SQS bills per request,
+    so under load this cuts both cost and round-trips by up to 10x.
+    """
+
+    def __init__(self, client, queue_url):
+        self._client = client
+        self._queue_url = queue_url
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="sqs-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, message_body, message_attributes):
+        future = Future()
+        entry = {
+            "MessageBody": message_body,
+            "MessageAttributes": message_attributes,
+        }
+        self._queue.put((entry, future))
+        return future
+
+    def _run(self):
+        while True:
+            # Block for the first entry, then collect for the rest of the
+            # window or until the batch is full
+            batch = [self._queue.get()]
+            batch_bytes = len(batch[0][0]["MessageBody"])
+            deadline = time.monotonic() + SQS_BATCH_WINDOW_SECONDS
+
+            while len(batch) < SQS_BATCH_MAX_ENTRIES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry, future = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+                # Respect the 256 KB total payload cap per batch request
+                entry_bytes = len(entry["MessageBody"])
+                if batch_bytes + entry_bytes > SQS_BATCH_MAX_BYTES:
+                    self._flush(batch)
+                    batch = []
+                    batch_bytes = 0
+
+                batch.append((entry, future))
+                batch_bytes += entry_bytes
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+
+        entries = []
+        futures = {}
+        for index, (entry, future) in enumerate(batch):
+            entry_id = str(index)
+            entries.append({"Id": entry_id, **entry})
+            futures[entry_id] = future
+
+        try:
+            response = self._client.send_message_batch(
+                QueueUrl=self._queue_url,
+                Entries=entries
+            )
+
+        except ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code", "Unknown")
+            error_msg = e.response.get("Error", {}).get("Message", str(e))
+            logger.error(f"SQS batch ClientError: {error_code} - {error_msg}")
+            for future in futures.values():
+                future.set_result((None, f"{error_code}: {error_msg}"))
+            return
+
+        except Exception as e:
+            logger.exception("Unexpected error in SQS batch send")
+            for future in futures.values():
+                future.set_result((None, f"Unexpected error: {str(e)}"))
+            return
+
+        for ok in response.get("Successful", []):
+            futures.pop(ok["Id"]).set_result((ok.get("MessageId"), None))
+
+        for failed in response.get("Failed", []):
+            error = f"{failed.get('Code', 'Unknown')}: {failed.get('Message', '')}"
+            futures.pop(failed["Id"]).set_result((None, error))
+
+        # Defensive: anything SQS reported in neither list counts as failed
+        for future in futures.values():
+            future.set_result((None, "No result entry in SQS batch response"))
+
+_sqs_batcher = _SqsBatcher(sqs_client, SQS_QUEUE_URL) if sqs_client else None
+
+# Deletion table for the allowed tenant-id charset: translate() strips the
+# valid characters in one C pass, so anything left over is invalid. Faster
+# than invoking the regex engine for a plain character-class test.
+_TENANT_INVALID = str.maketrans("", "", string.ascii_letters + string.digits + "-_")
+
 # Helper functions
 
 def generate_log_id():
-    return str(uuid.uuid4())
+    # 128 random bits in the familiar hyphenated UUID layout, built straight
+    # from os.urandom - skips uuid.UUID object construction and stringify
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
 def get_current_timestamp():
     return datetime.now(timezone.utc).isoformat()
 
+# orjson serializes in C, 3-10x faster than jsonify's pure-Python encoder;
+# used on the hot /ingest path
+def json_response(obj, status=200):
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
+
+# Fully static response bodies, serialized once at import so misrouted or
+# oversized requests don't rebuild and re-encode the same dict every time
+_PAYLOAD_TOO_LARGE_BODY = orjson.dumps({
+    "error": "Payload too large",
+    "details": f"Request body must not exceed {MAX_BODY_BYTES} bytes"
+})
+
+_NOT_FOUND_BODY = orjson.dumps({
+    "error": "Not Found",
+    "message": "The requested endpoint does not exist",
+    "available_endpoints": ["GET /health", "POST /ingest"]
+})
+
+_INTERNAL_ERROR_BODY = orjson.dumps({
+    "error": "Internal Server Error",
+    "message": "An unexpected error occurred",
+    "retry_after": 5
+})
+
 def validate_tenant_id(tenant_id):
     """
     Valid tenant ID rules: 
@@ -63,91 +240,79 @@ def validate_tenant_id(tenant_id):
     if len(tenant_id) > 64:
         return False, "tenant_id must be less than 64 characters"
 
-    if not re.match(r"^[a-zA-Z0-9-_]+$", tenant_id):
+    if tenant_id.translate(_TENANT_INVALID):
         return False, "tenant_id must only contain alphanumeric characters, hyphens, or underscores"
 
     return True, None
 
-# Normalize any input into unified internal format
-def normalize_payload(tenant_id, log_id, text, source):
+# Normalize any input into unified internal format; received_at lets callers
+# reuse a timestamp captured once at the top of the request
+def normalize_payload(tenant_id, log_id, text, source, received_at=None):
     return {
         "tenant_id": tenant_id.strip(),
         "log_id": log_id,
         "text" : text if text else "",
         "source": source,
-        "received_at": get_current_timestamp(),
+        "received_at": received_at or get_current_timestamp(),
         "text_length": len(text) if text else 0
     }
 
-# Send message to SQS queue with retries
-def send_to_sqs(payload, max_retries=3):
+# Send message to SQS queue with retries; callers that already serialized
+# the payload pass message_body so it isn't encoded a second time
+def send_to_sqs(payload, message_body=None, max_retries=3):
+    if message_body is None:
+        message_body = orjson.dumps(payload).decode()  # SQS requires str
+
     # Check if SQS is configured
     if not SQS_QUEUE_URL:
         logger.warning("SQS_QUEUE_URL not configured - running in local mode")
         # In local mode, just log and return success
-        logger.info(f"[LOCAL MODE] Would send to SQS: {json.dumps(payload)}")
+        logger.info("[LOCAL MODE] Would send to SQS: %s", message_body)
         return True, f"local-{generate_log_id()}", None
-    
-    if not sqs_client:
+
+    if not _sqs_batcher:
         return False, None, "SQS client not initialized"
-    
+
+    message_attributes = {
+        "tenant_id": {
+            "DataType": "String",
+            "StringValue": payload["tenant_id"]
+        },
+        "source": {
+            "DataType": "String",
+            "StringValue": payload["source"]
+        }
+    }
+
+    error = "Max retries exceeded"
     for attempt in range(max_retries):
         try:
-            # Send message to SQS
-            response = sqs_client.send_message(
-                QueueUrl=SQS_QUEUE_URL,
-                MessageBody=json.dumps(payload),
-                MessageAttributes={
-                    "tenant_id": {
-                        "DataType": "String",
-                        "StringValue": payload["tenant_id"]
-                    },
-                    "source": {
-                        "DataType": "String",
-                        "StringValue": payload["source"]
-                    }
-                }
-            )
-            
-            message_id = response.get("MessageId")
-            logger.info(f"Message sent to SQS: {message_id}")
-            return True, message_id, None
-            
-        except ClientError as e:
-            error_code = e.response.get("Error", {}).get("Code", "Unknown")
-            error_msg = e.response.get("Error", {}).get("Message", str(e))
-            
-            logger.error(f"SQS ClientError (attempt {attempt + 1}): {error_code} - {error_msg}")
-            
-            # Don't retry on validation errors
-            if error_code in ["InvalidParameterValue", "ValidationError", "AccessDenied"]:
-                return False, None, f"SQS validation error: {error_msg}"
-            
-            # Retry on transient errors with exponential backoff
-            if attempt < max_retries - 1:
-                sleep_time = 0.1 * (2 ** attempt)  # 0.1s, 0.2s, 0.4s
-                time.sleep(sleep_time)
-                continue
-            
-            return False, None, f"SQS error after {max_retries} attempts: {error_msg}"
-            
-        except BotoCoreError as e:
-            logger.error(f"SQS BotoCoreError (attempt {attempt + 1}): {str(e)}")
-            
-            if attempt < max_retries - 1:
-                time.sleep(0.1 * (2 ** attempt))
-                continue
-            
-            return False, None, f"AWS SDK error: {str(e)}"
-        
+            future = _sqs_batcher.submit(message_body, message_attributes)
+            message_id, error = future.result(timeout=30)
+
         except Exception as e:
             logger.exception("Unexpected error sending to SQS")
             return False, None, f"Unexpected error: {str(e)}"
-    
-    return False, None, "Max retries exceeded"
+
+        if not error:
+            logger.info(f"Message sent to SQS: {message_id}")
+            return True, message_id, None
+
+        logger.error(f"SQS send failed (attempt {attempt + 1}): {error}")
+
+        # Don't retry on validation errors
+        if any(code in error for code in ("InvalidParameterValue", "ValidationError", "AccessDenied")):
+            return False, None, f"SQS validation error: {error}"
+
+        # Retry on transient errors with exponential backoff
+        if attempt < max_retries - 1:
+            sleep_time = 0.1 * (2 ** attempt)  # 0.1s, 0.2s, 0.4s
+            time.sleep(sleep_time)
+
+    return False, None, f"SQS error after {max_retries} attempts: {error}"
 
 # Handle JSON payload ingestion
-def handle_json_payload(data):
+def handle_json_payload(data, received_at=None):
     tenant_id = data.get("tenant_id")
     valid, error = validate_tenant_id(tenant_id)
     if not valid:
@@ -175,13 +340,14 @@ def handle_json_payload(data):
         tenant_id = tenant_id,
         log_id = log_id,
         text = text,
-        source = "json_upload"
+        source = "json_upload",
+        received_at = received_at
     )
 
     return normalized, None, None
 
 # Handle text payload ingestion
-def handle_text_payload(raw_text, headers):
+def handle_text_payload(raw_text, headers, received_at=None):
     # Extract tenant from header (case-insensitive)
     tenant_id = headers.get("X-Tenant-ID") or headers.get("x-tenant-id")
     
@@ -202,7 +368,8 @@ def handle_text_payload(raw_text, headers):
         tenant_id=tenant_id,
         log_id=log_id,
         text=raw_text or "",
-        source="text_upload"
+        source="text_upload",
+        received_at=received_at
     )
 
     return normalized, None, None
@@ -226,84 +393,86 @@ def health_check():
 @app.route("/ingest", methods=["POST"])
 def ingest():
     content_type = request.content_type or ""
+    received_at = get_current_timestamp()  # captured once per request
     try:
+        # Reject oversized bodies up front - they can never reach the queue
+        if request.content_length and request.content_length > MAX_BODY_BYTES:
+            return Response(_PAYLOAD_TOO_LARGE_BODY, status=413, mimetype="application/json")
+
         # Routing based on content type
         if "application/json" in content_type:
             try:
-                data = request.get_json(force=False)
+                data = request.get_json(force=False, cache=False)
                 if data is None:
-                    return jsonify({
+                    return json_response({
                         "error": "Invalid JSON",
                         "details": "Request body myst be valid JSON"
-                    }), 400
+                    }, 400)
             except Exception as e:
                 logger.error(f"JSON parse error: {str(e)}")
-                return jsonify({
+                return json_response({
                     "error": "JSON parse error",
                     "details": str(e)
-                }), 400
+                }, 400)
             
-            normalized, error_response, status_code = handle_json_payload(data)
+            normalized, error_response, status_code = handle_json_payload(data, received_at)
         
         elif "text/plain" in content_type:
             # Get raw text body
-            raw_text = request.get_data(as_text=True)
-            normalized, error_response, status_code = handle_text_payload(raw_text, request.headers)
+            raw_text = request.get_data(as_text=True, cache=False)
+            normalized, error_response, status_code = handle_text_payload(raw_text, request.headers, received_at)
         
         else:
             # Unsupported content type
-            return jsonify({
+            return json_response({
                 "error": "Unsupported Content-Type",
                 "details": f"Expected 'application/json' or 'text/plain', got '{content_type}'",
                 "supported_types": ["application/json", "text/plain"]
-            }), 415
+            }, 415)
         
         # Return validation errors if any
         if error_response:
-            return jsonify(error_response), status_code
+            return json_response(error_response, status_code)
         
-        # Send to SQS
-        success, message_id, sqs_error = send_to_sqs(normalized)
+        # Serialize once; send_to_sqs reuses this body across retries
+        message_body = orjson.dumps(normalized).decode()
+        success, message_id, sqs_error = send_to_sqs(normalized, message_body)
 
         if not success:
             logger.error(f"SQS send failed for log_id={normalized['log_id']}: {sqs_error}")
-            return jsonify({
+            return json_response({
                 "error": "Queue unavailable",
                 "message": "Please retry your request",
                 "retry_after": 5,
                 "details": sqs_error
-            }), 500
+            }, 500)
         
         logger.info(f"Accepted: tenant={normalized['tenant_id']}, log={normalized['log_id']}")
 
-        return jsonify({
+        return json_response({
             "status": "accepted",
             "log_id": normalized["log_id"],
             "tenant_id": normalized["tenant_id"],
             "message": "Processing queued successfully",
             "message_id": message_id
-        }), 202
+        }, 202)
 
     except Exception as e:
         # Catch-all for unexpected errors
         logger.exception(f"Unexpected error in /ingest endpoint: {str(e)}")
-        return jsonify({
+        return json_response({
             "error": "Internal server error",
             "message": "An unexpected error occurred. Please retry.",
             "details": str(e),
             "retry_after": 5
-        }), 500
+        }, 500)
 
 # Error handlers
 
 @app.errorhandler(404)
 def not_found(e):
     """Handle 404 Not Found errors."""
-    return jsonify({
-        "error": "Not Found",
-        "message": "The requested endpoint does not exist",
-        "available_endpoints": ["GET /health", "POST /ingest"]
-    }), 404
+    return Response(_NOT_FOUND_BODY, status=404, mimetype="application/json")
 
 
 @app.errorhandler(405)
@@ -319,11 +488,7 @@ def method_not_allowed(e):
 def internal_error(e):
     """Handle 500 Internal Server errors."""
     logger.exception("Internal server error")
-    return jsonify({
-        "error": "Internal Server Error",
-        "message": "An unexpected error occurred",
-        "retry_after": 5
-    }), 500
+    return Response(_INTERNAL_ERROR_BODY, status=500, mimetype="application/json")
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
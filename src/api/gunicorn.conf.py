@@ -0,0 +1,12 @@
+import multiprocessing
+
+# Production server config. Werkzeug's dev server (app.run) is single
+# threaded; gevent workers cooperatively multiplex the SQS-bound I/O wait
+# across many concurrent requests per process.
+#
+# Run with: gunicorn -c gunicorn.conf.py app:app
+
+bind = "0.0.0.0:5000"
+workers = multiprocessing.cpu_count()
+worker_class = "gevent"
+worker_connections = 1000
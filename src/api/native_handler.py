@@ -0,0 +1,157 @@
+import base64
+import logging
+import os
+import sys
+
+# Ensure the app module is importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import orjson
+
+from app import (
+    AWS_REGION,
+    MAX_BODY_BYTES,
+    SQS_QUEUE_URL,
+    get_current_timestamp,
+    handle_json_payload,
+    handle_text_payload,
+    send_to_sqs,
+)
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Native Lambda entry point for the two API routes. Dispatching on the raw
+# event skips the Mangum -> ASGI -> WSGI -> Flask routing stack that used to
+# run on every invocation; app.py remains the local dev server.
+
+def _response(obj, status=200):
+    return {
+        "statusCode": status,
+        "headers": {"Content-Type": "application/json"},
+        "body": orjson.dumps(obj).decode(),
+    }
+
+# Static responses built once at import; the handler returns the same dict
+# every time instead of re-encoding identical bodies
+_PAYLOAD_TOO_LARGE_RESPONSE = _response({
+    "error": "Payload too large",
+    "details": f"Request body must not exceed {MAX_BODY_BYTES} bytes"
+}, 413)
+
+_NOT_FOUND_RESPONSE = _response({
+    "error": "Not Found",
+    "message": "The requested endpoint does not exist",
+    "available_endpoints": ["GET /health", "POST /ingest"]
+}, 404)
+
+def _health(event):
+    return _response({
+        "status": "healthy",
+        "timestamp": get_current_timestamp(),
+        "service": "robust-data-processor-api",
+        "config": {
+            "sqs_configured": bool(SQS_QUEUE_URL),
+            "region": AWS_REGION
+        }
+    })
+
+def _ingest(event):
+    received_at = get_current_timestamp()  # captured once per request
+    headers = event.get("headers") or {}
+    content_type = headers.get("content-type") or headers.get("Content-Type") or ""
+
+    body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8", errors="replace")
+
+    # Reject oversized bodies up front - they can never reach the queue
+    if len(body) > MAX_BODY_BYTES:
+        return _PAYLOAD_TOO_LARGE_RESPONSE
+
+    # Routing based on content type
+    if "application/json" in content_type:
+        try:
+            data = orjson.loads(body)
+        except orjson.JSONDecodeError as e:
+            logger.error(f"JSON parse error: {str(e)}")
+            return _response({
+                "error": "JSON parse error",
+                "details": str(e)
+            }, 400)
+
+        if not isinstance(data, dict):
+            return _response({
+                "error": "Invalid JSON",
+                "details": "Request body must be a JSON object"
+            }, 400)
+
+        normalized, error_response, status_code = handle_json_payload(data, received_at)
+
+    elif "text/plain" in content_type:
+        normalized, error_response, status_code = handle_text_payload(body, headers, received_at)
+
+    else:
+        # Unsupported content type
+        return _response({
+            "error": "Unsupported Content-Type",
+            "details": f"Expected 'application/json' or 'text/plain', got '{content_type}'",
+            "supported_types": ["application/json", "text/plain"]
+        }, 415)
+
+    # Return validation errors if any
+    if error_response:
+        return _response(error_response, status_code)
+
+    # Serialize once; send_to_sqs reuses this body across retries
+    message_body = orjson.dumps(normalized).decode()
+    success, message_id, sqs_error = send_to_sqs(normalized, message_body)
+
+    if not success:
+        logger.error(f"SQS send failed for log_id={normalized['log_id']}: {sqs_error}")
+        return _response({
+            "error": "Queue unavailable",
+            "message": "Please retry your request",
+            "retry_after": 5,
+            "details": sqs_error
+        }, 500)
+
+    logger.info(f"Accepted: tenant={normalized['tenant_id']}, log={normalized['log_id']}")
+
+    return _response({
+        "status": "accepted",
+        "log_id": normalized["log_id"],
+        "tenant_id": normalized["tenant_id"],
+        "message": "Processing queued successfully",
+        "message_id": message_id
+    }, 202)
+
+ROUTES = {
+    ("GET", "/health"): _health,
+    ("POST", "/ingest"): _ingest,
+}
+
+def lambda_handler(event, context):
+    http = (event.get("requestContext") or {}).get("http") or {}
+    method = http.get("method", "")
+    path = event.get("rawPath", "")
+
+    route = ROUTES.get((method, path))
+    if not route:
+        if any(known_path == path for _, known_path in ROUTES):
+            return _response({
+                "error": "Method Not Allowed",
+                "message": f"The {method} method is not allowed for this endpoint"
+            }, 405)
+        return _NOT_FOUND_RESPONSE
+
+    try:
+        return route(event)
+    except Exception as e:
+        logger.exception(f"Unexpected error handling {method} {path}: {str(e)}")
+        return _response({
+            "error": "Internal server error",
+            "message": "An unexpected error occurred. Please retry.",
+            "details": str(e),
+            "retry_after": 5
+        }, 500)
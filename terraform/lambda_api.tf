@@ -24,7 +24,7 @@ resource "aws_lambda_function" "api" {
   filename         = data.archive_file.api_lambda_zip.output_path
   function_name    = "${var.project_name}-api"
   role             = aws_iam_role.api_lambda_role.arn
-  handler          = "lambda_handler.handler"
+  handler          = "native_handler.lambda_handler"
   runtime          = "python3.11"
   source_code_hash = data.archive_file.api_lambda_zip.output_base64sha256
   timeout          = var.api_lambda_timeout